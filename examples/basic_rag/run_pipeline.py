@@ -9,9 +9,69 @@ This is a simple, beginner-friendly RAG pipeline that demonstrates the core conc
 
 Perfect for learning RAG fundamentals before moving to enterprise implementations.
 """
+import copy
+import heapq
+import math
+import os
+import re
 import sys
+from collections import Counter, OrderedDict
+from contextlib import suppress
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+
+
+# Indexed words: four or more word characters (shorter words are too common to help ranking)
+_WORD_RE = re.compile(r"\w{4,}")
+
+
+def _prepare_document(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the lowercased content and term counts used for indexing to a document."""
+    if "content_lower" not in doc:
+        doc["content_lower"] = doc["content"].lower()
+    doc["term_counts"] = Counter(_WORD_RE.findall(doc["content_lower"]))
+    return doc
+
+
+# Sample documents for demonstration, prepared for indexing once per process
+_SAMPLE_DOCS = tuple(_prepare_document(doc) for doc in [
+    {
+        "id": 1,
+        "title": "Company Vacation Policy",
+        "content": "Employees are entitled to 15 days of paid vacation per year. "
+                  "Vacation must be requested at least 2 weeks in advance and approved by a manager. "
+                  "Unused vacation days can be carried over to the next year, up to a maximum of 5 days."
+    },
+    {
+        "id": 2,
+        "title": "Remote Work Guidelines",
+        "content": "Employees may work remotely up to 3 days per week with manager approval. "
+                  "Remote workers must be available during core hours (10 AM - 3 PM) and maintain "
+                  "regular communication with their team. A home office stipend of $500 is provided annually."
+    },
+    {
+        "id": 3,
+        "title": "Health Benefits",
+        "content": "The company provides comprehensive health insurance covering medical, dental, and vision. "
+                  "Employee premiums are 20% of the total cost, with the company covering 80%. "
+                  "Dependents can be added to the plan. Annual enrollment period is in November."
+    },
+    {
+        "id": 4,
+        "title": "Performance Reviews",
+        "content": "Performance reviews are conducted annually in January. Employees receive feedback on "
+                  "their accomplishments, areas for improvement, and career development goals. "
+                  "Reviews are used to determine annual salary adjustments and bonus eligibility."
+    },
+    {
+        "id": 5,
+        "title": "Professional Development",
+        "content": "The company supports professional development with a $2,000 annual budget per employee. "
+                  "This can be used for courses, conferences, certifications, or books. "
+                  "Employees should submit a request form to their manager for approval."
+    }
+])
 
 
 class SimpleRAGPipeline:
@@ -24,14 +84,42 @@ class SimpleRAGPipeline:
     3. Generation: Creating an answer from the context
     """
     
-    def __init__(self, documents_path: str = None):
+    # BM25 parameters (standard defaults)
+    BM25_K1 = 1.5
+    BM25_B = 0.75
+    
+    # Minimum similarity for mapping an unknown query word onto an indexed term,
+    # and how many of those lookups are memoized
+    FUZZY_CUTOFF = 0.85
+    FUZZY_CACHE_SIZE = 1024
+    
+    # Maximum number of query results kept in the LRU cache
+    QUERY_CACHE_SIZE = 128
+    
+    # Where prepared documents loaded from a directory are cached between runs.
+    # None means ~/.cache/enterprise_rag, resolved on first use. Only the
+    # newest cache per pipeline type is kept; set the environment variable
+    # below (or pass cache_documents=False) to disable caching.
+    DOCUMENT_CACHE_DIR: Optional[Path] = None
+    DOCUMENT_CACHE_PREFIX = "basic"
+    DOCUMENT_CACHE_VERSION = 1
+    DOCUMENT_CACHE_DISABLE_ENV = "ENTERPRISE_RAG_NO_CACHE"
+    
+    # Document fields only needed to build the index, left out of search results
+    INDEX_ONLY_FIELDS = frozenset({"content_lower", "term_counts"})
+    
+    def __init__(self, documents_path: str = None, cache_documents: bool = True):
         """
         Initialize the pipeline with documents.
         
         Args:
             documents_path: Path to directory containing .txt documents
+            cache_documents: Cache prepared documents under DOCUMENT_CACHE_DIR.
+                Also disabled when ENTERPRISE_RAG_NO_CACHE is set.
         """
+        self.cache_documents = cache_documents and not os.getenv(self.DOCUMENT_CACHE_DISABLE_ENV)
         self.documents = []
+        self._query_cache: "OrderedDict[Tuple[str, int], Dict[str, Any]]" = OrderedDict()
         
         if documents_path:
             self.documents = self._load_documents(documents_path)
@@ -39,47 +127,12 @@ class SimpleRAGPipeline:
             # Use sample documents if no path provided
             self.documents = self._create_sample_documents()
         
+        self._build_index()
         print(f"✓ Loaded {len(self.documents)} documents")
     
     def _create_sample_documents(self) -> List[Dict[str, Any]]:
-        """Create sample documents for demonstration."""
-        return [
-            {
-                "id": 1,
-                "title": "Company Vacation Policy",
-                "content": "Employees are entitled to 15 days of paid vacation per year. "
-                          "Vacation must be requested at least 2 weeks in advance and approved by a manager. "
-                          "Unused vacation days can be carried over to the next year, up to a maximum of 5 days."
-            },
-            {
-                "id": 2,
-                "title": "Remote Work Guidelines",
-                "content": "Employees may work remotely up to 3 days per week with manager approval. "
-                          "Remote workers must be available during core hours (10 AM - 3 PM) and maintain "
-                          "regular communication with their team. A home office stipend of $500 is provided annually."
-            },
-            {
-                "id": 3,
-                "title": "Health Benefits",
-                "content": "The company provides comprehensive health insurance covering medical, dental, and vision. "
-                          "Employee premiums are 20% of the total cost, with the company covering 80%. "
-                          "Dependents can be added to the plan. Annual enrollment period is in November."
-            },
-            {
-                "id": 4,
-                "title": "Performance Reviews",
-                "content": "Performance reviews are conducted annually in January. Employees receive feedback on "
-                          "their accomplishments, areas for improvement, and career development goals. "
-                          "Reviews are used to determine annual salary adjustments and bonus eligibility."
-            },
-            {
-                "id": 5,
-                "title": "Professional Development",
-                "content": "The company supports professional development with a $2,000 annual budget per employee. "
-                          "This can be used for courses, conferences, certifications, or books. "
-                          "Employees should submit a request form to their manager for approval."
-            }
-        ]
+        """Return copies of the sample documents for demonstration."""
+        return [dict(doc) for doc in _SAMPLE_DOCS]
     
     def _load_documents(self, documents_path: str) -> List[Dict[str, Any]]:
         """Load documents from a directory."""
@@ -91,25 +144,186 @@ class SimpleRAGPipeline:
             print("Using sample documents instead...")
             return self._create_sample_documents()
         
-        for i, doc_file in enumerate(path.glob("*.txt"), start=1):
-            with open(doc_file, "r") as f:
-                content = f.read()
-            
-            documents.append({
+        doc_files = list(path.glob("*.txt"))
+        
+        # Reuse the documents prepared by a previous run if no file changed
+        cache_path = self._document_cache_path(doc_files)
+        cached = self._read_document_cache(cache_path)
+        if cached is not None:
+            return cached
+        
+        # Imported here so runs on the built-in samples don't pay for it
+        from concurrent.futures import ThreadPoolExecutor
+        
+        # Overlap the blocking file reads across a thread pool
+        with ThreadPoolExecutor(max_workers=min(32, len(doc_files) or 1)) as executor:
+            contents = list(executor.map(Path.read_text, doc_files))
+        
+        for i, (doc_file, content) in enumerate(zip(doc_files, contents), start=1):
+            documents.append(_prepare_document({
                 "id": i,
                 "title": doc_file.stem.replace("_", " ").title(),
                 "content": content
-            })
+            }))
+        
+        if not documents:
+            return self._create_sample_documents()
         
-        return documents if documents else self._create_sample_documents()
+        self._write_document_cache(cache_path, documents)
+        return documents
+    
+    def _document_cache_path(self, doc_files: List[Path]) -> Optional[Path]:
+        """
+        Return the cache file for a set of document files.
+        
+        The key hashes each file's path, size and modification time, so
+        adding, removing or editing any file invalidates the cache.
+        """
+        if not doc_files or not self.cache_documents:
+            return None
+        
+        cache_dir = self.DOCUMENT_CACHE_DIR
+        if cache_dir is None:
+            try:
+                cache_dir = Path.home() / ".cache" / "enterprise_rag"
+            except RuntimeError:
+                # No resolvable home directory: run without a cache
+                return None
+        
+        # Cache helpers import lazily: only directory loads reach them
+        import hashlib
+        
+        digest = hashlib.blake2b(f"v{self.DOCUMENT_CACHE_VERSION}".encode(), digest_size=16)
+        for doc_file in sorted(doc_files):
+            stat = doc_file.stat()
+            digest.update(f"{doc_file.resolve()}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+        return cache_dir / f"{self.DOCUMENT_CACHE_PREFIX}_{digest.hexdigest()}.pkl"
+    
+    def _read_document_cache(self, cache_path: Optional[Path]) -> Optional[List[Dict[str, Any]]]:
+        """Load cached documents, or return None if there is no usable cache."""
+        if cache_path is None or not cache_path.exists():
+            return None
+        
+        import pickle
+        
+        try:
+            with open(cache_path, "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            # A corrupt or incompatible cache is simply rebuilt
+            return None
+    
+    def _write_document_cache(self, cache_path: Optional[Path], documents: List[Dict[str, Any]]):
+        """
+        Save prepared documents to the cache, ignoring unwritable locations.
+        
+        The directory is created owner-only (0700) and the file written
+        0600. Older caches from this pipeline type are removed afterwards,
+        so editing documents does not leave a trail of stale cache files.
+        """
+        if cache_path is None:
+            return
+        
+        import pickle
+        
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            cache_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with open(fd, "wb") as f:
+                pickle.dump(documents, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            with suppress(OSError):
+                tmp_path.unlink(missing_ok=True)
+            return
+        
+        for stale_path in cache_path.parent.glob(f"{self.DOCUMENT_CACHE_PREFIX}_*.pkl"):
+            if stale_path != cache_path:
+                with suppress(OSError):
+                    stale_path.unlink()
+    
+    def _build_index(self):
+        """
+        Build an inverted index over the documents for BM25 scoring.
+        
+        Each term maps to a posting list of (document index, BM25 weight).
+        The weights are the non-zero entries of the term-document BM25
+        matrix, computed once here so a search only has to sum them for
+        the query terms.
+        """
+        k1, b = self.BM25_K1, self.BM25_B
+        term_counts = [doc["term_counts"] for doc in self.documents]
+        
+        self.doc_len: List[int] = [sum(counts.values()) for counts in term_counts]
+        self.N = len(self.documents)
+        self.avgdl = sum(self.doc_len) / self.N if self.N else 0.0
+        self.df: Dict[str, int] = Counter(term for counts in term_counts for term in counts)
+        self.idf: Dict[str, float] = {
+            term: math.log(1 + (self.N - df + 0.5) / (df + 0.5)) for term, df in self.df.items()
+        }
+        
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+        for doc_idx, counts in enumerate(term_counts):
+            if not counts:
+                continue
+            norm = k1 * (1 - b + b * self.doc_len[doc_idx] / self.avgdl)
+            for term, tf in counts.items():
+                weight = self.idf[term] * (tf * (k1 + 1)) / (tf + norm)
+                self.postings.setdefault(term, []).append((doc_idx, weight))
+        
+        # Candidate terms for fuzzy matching bucketed by first letter and
+        # length, and an LRU of memoized lookups
+        self._fuzzy_vocab: Dict[Tuple[str, int], List[str]] = {}
+        for term in self.postings:
+            self._fuzzy_vocab.setdefault((term[0], len(term)), []).append(term)
+        self._fuzzy_terms: "OrderedDict[str, Optional[str]]" = OrderedDict()
+    
+    def _resolve_term(self, term: str) -> Optional[str]:
+        """
+        Map a query term onto the index vocabulary.
+        
+        Terms missing from the index (plural forms, typos) fall back to the
+        closest indexed term with the same first letter, so near misses still
+        retrieve documents.
+        """
+        if term in self.postings:
+            return term
+        if term in self._fuzzy_terms:
+            self._fuzzy_terms.move_to_end(term)
+            return self._fuzzy_terms[term]
+        
+        # Only queries with unknown words need difflib, so it is imported here
+        import difflib
+        
+        # difflib's ratio is 2*M / (len(a) + len(b)) with M at most the shorter
+        # length, so only terms within this length ratio can reach the cutoff
+        stretch = 2 / self.FUZZY_CUTOFF - 1
+        candidates = [
+            candidate
+            for length in range(int(len(term) / stretch), int(len(term) * stretch) + 2)
+            for candidate in self._fuzzy_vocab.get((term[0], length), ())
+        ]
+        matches = difflib.get_close_matches(term, candidates, n=1, cutoff=self.FUZZY_CUTOFF)
+        
+        self._fuzzy_terms[term] = matches[0] if matches else None
+        if len(self._fuzzy_terms) > self.FUZZY_CACHE_SIZE:
+            self._fuzzy_terms.popitem(last=False)
+        return matches[0] if matches else None
+    
+    def _make_result(self, doc: Dict[str, Any], score: float) -> Dict[str, Any]:
+        """Build a search result from a document, without its index-only fields."""
+        result = {key: value for key, value in doc.items() if key not in self.INDEX_ONLY_FIELDS}
+        result["score"] = score
+        return result
     
     def search(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
         """
-        Search for relevant documents using simple keyword matching.
+        Search for relevant documents using BM25 keyword scoring.
         
         In a production system, this would use:
         - Vector embeddings for semantic search
-        - BM25 for keyword matching
+        - BM25 for keyword matching (what this example uses)
         - Hybrid search combining both approaches
         
         Args:
@@ -119,29 +333,19 @@ class SimpleRAGPipeline:
         Returns:
             List of relevant documents with scores
         """
-        query_lower = query.lower()
-        scored_docs = []
+        # Each distinct query word is scored once; short words are skipped
+        query_terms = {self._resolve_term(term) for term in _WORD_RE.findall(query.lower())}
+        query_terms.discard(None)
+        scores: Dict[int, float] = {}
         
-        # Simple keyword matching for demonstration
-        for doc in self.documents:
-            score = 0
-            content_lower = doc["content"].lower()
-            
-            # Count how many query words appear in the document
-            query_words = query_lower.split()
-            for word in query_words:
-                if len(word) > 3:  # Skip short words
-                    score += content_lower.count(word)
-            
-            if score > 0:
-                scored_docs.append({
-                    **doc,
-                    "score": score
-                })
-        
-        # Sort by score and return top_k
-        scored_docs.sort(key=lambda x: x["score"], reverse=True)
-        return scored_docs[:top_k]
+        # Only documents that share a term with the query are ever scored
+        for term in query_terms:
+            for doc_idx, weight in self.postings.get(term, ()):
+                scores[doc_idx] = scores.get(doc_idx, 0.0) + weight
+        
+        # Pick top_k without sorting every match
+        top = heapq.nlargest(top_k, scores.items(), key=itemgetter(1))
+        return [self._make_result(self.documents[doc_idx], score) for doc_idx, score in top]
     
     def generate_answer(self, query: str, context_docs: List[Dict[str, Any]]) -> str:
         """
@@ -187,17 +391,30 @@ class SimpleRAGPipeline:
         Returns:
             Dict with answer and source documents
         """
+        # Repeated questions are served from the cache
+        cache_key = (question.strip().lower(), top_k)
+        cached = self._query_cache.get(cache_key)
+        if cached is not None:
+            self._query_cache.move_to_end(cache_key)
+            return {**copy.deepcopy(cached), "question": question}
+        
         # Step 1: Retrieve relevant documents
         relevant_docs = self.search(question, top_k)
         
         # Step 2 & 3: Generate answer from context
         answer = self.generate_answer(question, relevant_docs)
         
-        return {
+        result = {
             "question": question,
             "answer": answer,
             "sources": relevant_docs
         }
+        
+        self._query_cache[cache_key] = copy.deepcopy(result)
+        if len(self._query_cache) > self.QUERY_CACHE_SIZE:
+            self._query_cache.popitem(last=False)
+        
+        return result
 
 
 def main():
@@ -261,7 +478,7 @@ def main():
     
     print("📚 Sources:")
     for doc in result["sources"]:
-        print(f"  • {doc['title']} (relevance score: {doc['score']})")
+        print(f"  • {doc['title']} (relevance score: {doc['score']:.2f})")
     print()
     
     print("=" * 80)
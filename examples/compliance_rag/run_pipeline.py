@@ -14,11 +14,103 @@ Perfect for: Finance, Healthcare, Legal, and Pharmaceutical industries
 """
 import sys
 import re
-import json
+import copy
+import heapq
+import math
+import os
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import suppress
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Dict, Any
-from datetime import datetime
-import hashlib
+from typing import List, Dict, Any, Optional, Set, Tuple
+from datetime import datetime, timezone
+
+
+# Classification names ordered from least to most sensitive, and their levels
+_CLASSIFICATION_NAMES = ('PUBLIC', 'INTERNAL', 'CONFIDENTIAL', 'RESTRICTED')
+_CLASSIFICATION_LEVELS = {name: level for level, name in enumerate(_CLASSIFICATION_NAMES)}
+
+# Sensitive keywords for auto-classification, fused so a document is scanned once
+_CLASSIFICATION_RE = re.compile(
+    r"(?P<CONFIDENTIAL>confidential|restricted|secret|patient|ssn)"
+    r"|(?P<INTERNAL>internal|proprietary)"
+)
+
+# Audit log levels; entries below the pipeline's audit_level are not recorded
+_AUDIT_LEVELS = {'DEBUG': 10, 'INFO': 20}
+
+
+# Indexed words: four or more word characters (shorter words are too common to help ranking)
+_WORD_RE = re.compile(r"\w{4,}")
+
+
+def _prepare_document(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the lowercased content and term counts used for indexing to a document."""
+    if "content_lower" not in doc:
+        doc["content_lower"] = doc["content"].lower()
+    doc["term_counts"] = Counter(_WORD_RE.findall(doc["content_lower"]))
+    return doc
+
+
+# Sample compliance-focused documents, prepared for indexing once per process
+_SAMPLE_DOCS = tuple(_prepare_document(doc) for doc in [
+    {
+        "id": "HIPAA-001",
+        "title": "Patient Data Retention Policy",
+        "content": "All patient records must be retained for a minimum of 7 years per HIPAA regulations. "
+                  "Medical records for minors must be kept until the patient reaches age 21. "
+                  "Electronic health records must be encrypted at rest and in transit using AES-256. "
+                  "Access to patient data requires multi-factor authentication and is logged.",
+        "classification": "CONFIDENTIAL",
+        "category": "healthcare_compliance",
+        "requires_authorization": True
+    },
+    {
+        "id": "GDPR-002",
+        "title": "Data Subject Rights",
+        "content": "Under GDPR, individuals have the right to access their personal data, request corrections, "
+                  "and request deletion (right to be forgotten). Organizations must respond to data subject "
+                  "requests within 30 days. Personal data must not be transferred outside the EU without "
+                  "adequate safeguards. All data processing activities must have a legal basis.",
+        "classification": "CONFIDENTIAL",
+        "category": "privacy_compliance",
+        "requires_authorization": True
+    },
+    {
+        "id": "SOX-003",
+        "title": "Financial Controls",
+        "content": "Sarbanes-Oxley Act requires public companies to maintain accurate financial records. "
+                  "All financial transactions must have dual approval and complete audit trails. "
+                  "Internal controls must be documented and tested annually. Executive certification "
+                  "of financial statements is required. Retention period for audit materials is 7 years.",
+        "classification": "CONFIDENTIAL",
+        "category": "financial_compliance",
+        "requires_authorization": True
+    },
+    {
+        "id": "FDA-004",
+        "title": "Adverse Event Reporting",
+        "content": "FDA requires reporting of serious adverse events within specific timeframes: "
+                  "fatal or life-threatening events within 7 days, other serious events within 15 days. "
+                  "All adverse event records must be maintained for the lifetime of the drug plus 10 years. "
+                  "Safety data must comply with 21 CFR Part 312 and be submitted electronically via FDA ESG.",
+        "classification": "CONFIDENTIAL",
+        "category": "pharma_compliance",
+        "requires_authorization": True
+    },
+    {
+        "id": "PCI-005",
+        "title": "Payment Card Data Security",
+        "content": "PCI DSS requires encryption of cardholder data during transmission over public networks. "
+                  "Card data must not be stored after authorization unless encrypted. Access to cardholder "
+                  "data must be restricted on a need-to-know basis. Regular penetration testing and "
+                  "vulnerability scans are mandatory. Incident response plans must be tested annually.",
+        "classification": "RESTRICTED",
+        "category": "payment_compliance",
+        "requires_authorization": True
+    }
+])
 
 
 class ComplianceRAGPipeline:
@@ -41,17 +133,70 @@ class ComplianceRAGPipeline:
         'credit_card': r'\b\d{4}[-\s]?\d{4}[-\s]?\d{4}[-\s]?\d{4}\b',
     }
     
-    def __init__(self, documents_path: str = None, user_id: str = "default_user"):
+    # All PII patterns fused into one compiled alternation so text is scanned once
+    _PII_RE = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in PII_PATTERNS.items()))
+    
+    # Placeholders left by redaction; never used as search terms
+    _REDACTION_RE = re.compile(r"\[REDACTED-[A-Z_]+\]")
+    
+    # BM25 parameters (standard defaults)
+    BM25_K1 = 1.5
+    BM25_B = 0.75
+    
+    # Minimum similarity for mapping an unknown query word onto an indexed term,
+    # and how many of those lookups are memoized
+    FUZZY_CUTOFF = 0.85
+    FUZZY_CACHE_SIZE = 1024
+    
+    # Maximum number of query results kept in the LRU cache
+    QUERY_CACHE_SIZE = 128
+    
+    # Where prepared documents loaded from a directory are cached between runs
+    # when cache_documents=True. The cache holds full document text, so it is
+    # off by default here and written owner-only. None means
+    # ~/.cache/enterprise_rag, resolved on first use. Only the newest cache
+    # per pipeline type is kept; the environment variable below overrides
+    # cache_documents=True.
+    DOCUMENT_CACHE_DIR: Optional[Path] = None
+    DOCUMENT_CACHE_PREFIX = "compliance"
+    DOCUMENT_CACHE_VERSION = 1
+    DOCUMENT_CACHE_DISABLE_ENV = "ENTERPRISE_RAG_NO_CACHE"
+    
+    # Document fields only needed to build the index, left out of search results
+    INDEX_ONLY_FIELDS = frozenset({"content_lower", "term_counts"})
+    
+    # Maximum number of audit entries kept in memory (oldest are dropped first)
+    AUDIT_LOG_MAXLEN = 100_000
+    
+    def __init__(
+        self,
+        documents_path: str = None,
+        user_id: str = "default_user",
+        audit_level: str = "INFO",
+        cache_documents: bool = False,
+    ):
         """
         Initialize the compliance RAG pipeline.
         
         Args:
             documents_path: Path to documents (default: sample documents)
             user_id: User identifier for audit logging
+            audit_level: Lowest audit level to record. "INFO" keeps summary
+                events; "DEBUG" also records per-document authorization checks.
+            cache_documents: Cache prepared documents, including their full
+                text, under DOCUMENT_CACHE_DIR (owner-only permissions). Off by
+                default; ENTERPRISE_RAG_NO_CACHE also disables it.
         """
+        if audit_level not in _AUDIT_LEVELS:
+            raise ValueError(f"audit_level must be one of {list(_AUDIT_LEVELS)}, got {audit_level!r}")
+        
         self.user_id = user_id
-        self.audit_log = []
+        self.cache_documents = cache_documents and not os.getenv(self.DOCUMENT_CACHE_DISABLE_ENV)
+        self.audit_level = audit_level
+        self._audit_threshold = _AUDIT_LEVELS[audit_level]
+        self.audit_log: deque = deque(maxlen=self.AUDIT_LOG_MAXLEN)
         self.documents = []
+        self._query_cache: "OrderedDict[Tuple[str, int], Dict[str, Any]]" = OrderedDict()
         
         if documents_path:
             self.documents = self._load_documents(documents_path)
@@ -60,66 +205,20 @@ class ComplianceRAGPipeline:
         
         print(f"✓ Loaded {len(self.documents)} classified documents")
         self._log_action("SYSTEM_INIT", f"Loaded {len(self.documents)} documents")
+        
+        # Authorization is resolved once per user here instead of per search
+        self._searchable_docs = [doc for doc in self.documents if self._check_authorization(doc)]
+        self._log_action(
+            "AUTHORIZATION_PRECOMPUTED",
+            f"{len(self._searchable_docs)} of {len(self.documents)} documents searchable",
+            {'searchable': len(self._searchable_docs), 'total': len(self.documents)}
+        )
+        
+        self._build_index()
     
     def _create_sample_documents(self) -> List[Dict[str, Any]]:
-        """Create sample compliance-focused documents."""
-        return [
-            {
-                "id": "HIPAA-001",
-                "title": "Patient Data Retention Policy",
-                "content": "All patient records must be retained for a minimum of 7 years per HIPAA regulations. "
-                          "Medical records for minors must be kept until the patient reaches age 21. "
-                          "Electronic health records must be encrypted at rest and in transit using AES-256. "
-                          "Access to patient data requires multi-factor authentication and is logged.",
-                "classification": "CONFIDENTIAL",
-                "category": "healthcare_compliance",
-                "requires_authorization": True
-            },
-            {
-                "id": "GDPR-002",
-                "title": "Data Subject Rights",
-                "content": "Under GDPR, individuals have the right to access their personal data, request corrections, "
-                          "and request deletion (right to be forgotten). Organizations must respond to data subject "
-                          "requests within 30 days. Personal data must not be transferred outside the EU without "
-                          "adequate safeguards. All data processing activities must have a legal basis.",
-                "classification": "CONFIDENTIAL",
-                "category": "privacy_compliance",
-                "requires_authorization": True
-            },
-            {
-                "id": "SOX-003",
-                "title": "Financial Controls",
-                "content": "Sarbanes-Oxley Act requires public companies to maintain accurate financial records. "
-                          "All financial transactions must have dual approval and complete audit trails. "
-                          "Internal controls must be documented and tested annually. Executive certification "
-                          "of financial statements is required. Retention period for audit materials is 7 years.",
-                "classification": "CONFIDENTIAL",
-                "category": "financial_compliance",
-                "requires_authorization": True
-            },
-            {
-                "id": "FDA-004",
-                "title": "Adverse Event Reporting",
-                "content": "FDA requires reporting of serious adverse events within specific timeframes: "
-                          "fatal or life-threatening events within 7 days, other serious events within 15 days. "
-                          "All adverse event records must be maintained for the lifetime of the drug plus 10 years. "
-                          "Safety data must comply with 21 CFR Part 312 and be submitted electronically via FDA ESG.",
-                "classification": "CONFIDENTIAL",
-                "category": "pharma_compliance",
-                "requires_authorization": True
-            },
-            {
-                "id": "PCI-005",
-                "title": "Payment Card Data Security",
-                "content": "PCI DSS requires encryption of cardholder data during transmission over public networks. "
-                          "Card data must not be stored after authorization unless encrypted. Access to cardholder "
-                          "data must be restricted on a need-to-know basis. Regular penetration testing and "
-                          "vulnerability scans are mandatory. Incident response plans must be tested annually.",
-                "classification": "RESTRICTED",
-                "category": "payment_compliance",
-                "requires_authorization": True
-            }
-        ]
+        """Return copies of the sample compliance-focused documents."""
+        return [dict(doc) for doc in _SAMPLE_DOCS]
     
     def _load_documents(self, documents_path: str) -> List[Dict[str, Any]]:
         """Load and classify documents from a directory."""
@@ -131,67 +230,170 @@ class ComplianceRAGPipeline:
             print("Using sample documents instead...")
             return self._create_sample_documents()
         
-        for i, doc_file in enumerate(path.glob("*.txt"), start=1):
-            with open(doc_file, "r") as f:
-                content = f.read()
-            
+        doc_files = list(path.glob("*.txt"))
+        
+        # Reuse the documents prepared by a previous run if no file changed
+        cache_path = self._document_cache_path(doc_files)
+        cached = self._read_document_cache(cache_path)
+        if cached is not None:
+            return cached
+        
+        # Imported here so runs on the built-in samples don't pay for it
+        from concurrent.futures import ThreadPoolExecutor
+        
+        # Overlap the blocking file reads across a thread pool
+        with ThreadPoolExecutor(max_workers=min(32, len(doc_files) or 1)) as executor:
+            contents = list(executor.map(Path.read_text, doc_files))
+        
+        for i, (doc_file, content) in enumerate(zip(doc_files, contents), start=1):
             # Auto-classify based on content
-            classification = self._classify_document(content)
+            content_lower = content.lower()
+            classification = self._classify_document(content_lower)
             
-            documents.append({
+            documents.append(_prepare_document({
                 "id": f"DOC-{i:03d}",
                 "title": doc_file.stem.replace("_", " ").title(),
                 "content": content,
+                "content_lower": content_lower,
                 "classification": classification,
                 "category": "user_document",
                 "requires_authorization": classification in ["CONFIDENTIAL", "RESTRICTED"]
-            })
+            }))
+        
+        if not documents:
+            return self._create_sample_documents()
         
-        return documents if documents else self._create_sample_documents()
+        self._write_document_cache(cache_path, documents)
+        return documents
     
-    def _classify_document(self, content: str) -> str:
+    def _document_cache_path(self, doc_files: List[Path]) -> Optional[Path]:
         """
-        Auto-classify document based on content.
-        In production, this would use ML models or metadata.
+        Return the cache file for a set of document files.
+        
+        The key hashes each file's path, size and modification time, so
+        adding, removing or editing any file invalidates the cache.
         """
-        content_lower = content.lower()
+        if not doc_files or not self.cache_documents:
+            return None
         
-        # Check for sensitive keywords
-        if any(word in content_lower for word in ['confidential', 'restricted', 'secret', 'patient', 'ssn']):
-            return "CONFIDENTIAL"
-        elif any(word in content_lower for word in ['internal', 'proprietary']):
-            return "INTERNAL"
-        else:
-            return "PUBLIC"
+        cache_dir = self.DOCUMENT_CACHE_DIR
+        if cache_dir is None:
+            try:
+                cache_dir = Path.home() / ".cache" / "enterprise_rag"
+            except RuntimeError:
+                # No resolvable home directory: run without a cache
+                return None
+        
+        # Cache helpers import lazily: only directory loads reach them
+        import hashlib
+        
+        digest = hashlib.blake2b(f"v{self.DOCUMENT_CACHE_VERSION}".encode(), digest_size=16)
+        for doc_file in sorted(doc_files):
+            stat = doc_file.stat()
+            digest.update(f"{doc_file.resolve()}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+        return cache_dir / f"{self.DOCUMENT_CACHE_PREFIX}_{digest.hexdigest()}.pkl"
     
-    def _detect_pii(self, text: str) -> List[Dict[str, Any]]:
-        """Detect PII in text."""
-        detected_pii = []
+    def _read_document_cache(self, cache_path: Optional[Path]) -> Optional[List[Dict[str, Any]]]:
+        """Load cached documents, or return None if there is no usable cache."""
+        if cache_path is None or not cache_path.exists():
+            return None
+        
+        import pickle
+        
+        try:
+            with open(cache_path, "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            # A corrupt or incompatible cache is simply rebuilt
+            return None
+    
+    def _write_document_cache(self, cache_path: Optional[Path], documents: List[Dict[str, Any]]):
+        """
+        Save prepared documents to the cache, ignoring unwritable locations.
         
-        for pii_type, pattern in self.PII_PATTERNS.items():
-            matches = re.finditer(pattern, text)
-            for match in matches:
-                detected_pii.append({
-                    'type': pii_type,
-                    'value': match.group(),
-                    'position': match.span()
-                })
+        The directory is created owner-only (0700) and the file written
+        0600. Older caches from this pipeline type are removed afterwards,
+        so editing documents does not leave a trail of stale cache files.
+        """
+        if cache_path is None:
+            return
+        
+        import pickle
+        
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            cache_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with open(fd, "wb") as f:
+                pickle.dump(documents, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            with suppress(OSError):
+                tmp_path.unlink(missing_ok=True)
+            return
         
-        return detected_pii
+        for stale_path in cache_path.parent.glob(f"{self.DOCUMENT_CACHE_PREFIX}_*.pkl"):
+            if stale_path != cache_path:
+                with suppress(OSError):
+                    stale_path.unlink()
+    
+    def _classify_document(self, content_lower: str) -> str:
+        """
+        Auto-classify document based on its lowercased content.
+        In production, this would use ML models or metadata.
+        """
+        # Check for sensitive keywords in a single pass; any confidential
+        # keyword wins, otherwise an internal keyword marks it INTERNAL
+        classification = "PUBLIC"
+        for match in _CLASSIFICATION_RE.finditer(content_lower):
+            if match.lastgroup == "CONFIDENTIAL":
+                return "CONFIDENTIAL"
+            classification = "INTERNAL"
+        return classification
+    
+    def _detect_pii(self, text: str) -> List[Dict[str, Any]]:
+        """Detect PII in text."""
+        return [
+            {
+                'type': match.lastgroup,
+                'value': match.group(),
+                'position': match.span()
+            }
+            for match in self._PII_RE.finditer(text)
+        ]
     
     def _redact_pii(self, text: str) -> str:
         """Redact PII from text."""
-        redacted_text = text
+        return self._PII_RE.sub(lambda match: f'[REDACTED-{match.lastgroup.upper()}]', text)
+    
+    def _scan_and_redact(self, text: str) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Detect and redact PII in a single regex pass.
         
-        for pii_type, pattern in self.PII_PATTERNS.items():
-            redacted_text = re.sub(pattern, f'[REDACTED-{pii_type.upper()}]', redacted_text)
+        Returns:
+            Tuple of (redacted text, detected PII)
+        """
+        detected_pii = []
         
-        return redacted_text
+        def redact(match: re.Match) -> str:
+            detected_pii.append({
+                'type': match.lastgroup,
+                'value': match.group(),
+                'position': match.span()
+            })
+            return f'[REDACTED-{match.lastgroup.upper()}]'
+        
+        return self._PII_RE.sub(redact, text), detected_pii
     
-    def _log_action(self, action: str, details: str, metadata: Dict[str, Any] = None):
-        """Log an action for audit purposes."""
+    def _log_action(
+        self, action: str, details: str, metadata: Dict[str, Any] = None, level: str = "INFO"
+    ):
+        """Log an action for audit purposes, if its level is being audited."""
+        if _AUDIT_LEVELS[level] < self._audit_threshold:
+            return
+        
         log_entry = {
-            'timestamp': datetime.utcnow().isoformat(),
+            'ts_ns': time.time_ns(),
             'user_id': self.user_id,
             'action': action,
             'details': details,
@@ -199,69 +401,177 @@ class ComplianceRAGPipeline:
         }
         self.audit_log.append(log_entry)
     
+    @staticmethod
+    def _format_log_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Resolve an audit entry's raw nanosecond timestamp to ISO format (UTC)."""
+        # Split in integer arithmetic; dividing by 1e9 as a float can be off by 1µs
+        seconds, nanos = divmod(entry['ts_ns'], 1_000_000_000)
+        timestamp = datetime.fromtimestamp(seconds, tz=timezone.utc).replace(microsecond=nanos // 1000)
+        formatted = {'timestamp': timestamp.isoformat()}
+        formatted.update((key, value) for key, value in entry.items() if key != 'ts_ns')
+        return formatted
+    
     def _check_authorization(self, document: Dict[str, Any]) -> bool:
         """
         Check if user is authorized to access the document.
         In production, this would integrate with identity management systems.
         """
-        # For demo, we'll allow access but log it
-        if document.get('requires_authorization'):
+        # For demo, we'll allow access but log it (per-document detail is DEBUG level)
+        if document.get('requires_authorization') and self._audit_threshold <= _AUDIT_LEVELS['DEBUG']:
             self._log_action(
                 "AUTHORIZATION_CHECK",
                 f"Access to {document['classification']} document {document['id']}",
-                {'document_id': document['id'], 'classification': document['classification']}
+                {'document_id': document['id'], 'classification': document['classification']},
+                level="DEBUG"
             )
         return True
     
-    def search(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
+    def _build_index(self):
         """
-        Search for relevant documents with PII detection.
+        Build an inverted index over the searchable documents for BM25 scoring.
+        
+        Each term maps to a posting list of (document index, BM25 weight).
+        The weights are the non-zero entries of the term-document BM25
+        matrix, computed once here so a search only has to sum them for
+        the query terms.
+        """
+        k1, b = self.BM25_K1, self.BM25_B
+        term_counts = [doc["term_counts"] for doc in self._searchable_docs]
+        
+        self.doc_len: List[int] = [sum(counts.values()) for counts in term_counts]
+        self.N = len(self._searchable_docs)
+        self.avgdl = sum(self.doc_len) / self.N if self.N else 0.0
+        self.df: Dict[str, int] = Counter(term for counts in term_counts for term in counts)
+        self.idf: Dict[str, float] = {
+            term: math.log(1 + (self.N - df + 0.5) / (df + 0.5)) for term, df in self.df.items()
+        }
+        
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+        for doc_idx, counts in enumerate(term_counts):
+            if not counts:
+                continue
+            norm = k1 * (1 - b + b * self.doc_len[doc_idx] / self.avgdl)
+            for term, tf in counts.items():
+                weight = self.idf[term] * (tf * (k1 + 1)) / (tf + norm)
+                self.postings.setdefault(term, []).append((doc_idx, weight))
+        
+        # Candidate terms for fuzzy matching bucketed by first letter and
+        # length, and an LRU of memoized lookups
+        self._fuzzy_vocab: Dict[Tuple[str, int], List[str]] = {}
+        for term in self.postings:
+            self._fuzzy_vocab.setdefault((term[0], len(term)), []).append(term)
+        self._fuzzy_terms: "OrderedDict[str, Optional[str]]" = OrderedDict()
+    
+    def _resolve_term(self, term: str) -> Optional[str]:
+        """
+        Map a query term onto the index vocabulary.
+        
+        Terms missing from the index (plural forms, typos) fall back to the
+        closest indexed term with the same first letter, so near misses still
+        retrieve documents.
+        """
+        if term in self.postings:
+            return term
+        if term in self._fuzzy_terms:
+            self._fuzzy_terms.move_to_end(term)
+            return self._fuzzy_terms[term]
+        
+        # Only queries with unknown words need difflib, so it is imported here
+        import difflib
+        
+        # difflib's ratio is 2*M / (len(a) + len(b)) with M at most the shorter
+        # length, so only terms within this length ratio can reach the cutoff
+        stretch = 2 / self.FUZZY_CUTOFF - 1
+        candidates = [
+            candidate
+            for length in range(int(len(term) / stretch), int(len(term) * stretch) + 2)
+            for candidate in self._fuzzy_vocab.get((term[0], length), ())
+        ]
+        matches = difflib.get_close_matches(term, candidates, n=1, cutoff=self.FUZZY_CUTOFF)
+        
+        self._fuzzy_terms[term] = matches[0] if matches else None
+        if len(self._fuzzy_terms) > self.FUZZY_CACHE_SIZE:
+            self._fuzzy_terms.popitem(last=False)
+        return matches[0] if matches else None
+    
+    def _screen_query(self, query: str) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Detect and redact PII in a query, logging any detection.
         
-        Args:
-            query: Search query
-            top_k: Number of documents to return
-            
         Returns:
-            List of relevant documents
+            Tuple of (redacted query, detected PII)
         """
-        # Check for PII in query
-        pii_detected = self._detect_pii(query)
+        redacted_query, pii_detected = self._scan_and_redact(query)
         if pii_detected:
             self._log_action(
                 "PII_DETECTED_IN_QUERY",
                 f"Query contains {len(pii_detected)} PII instances",
                 {'pii_types': [p['type'] for p in pii_detected]}
             )
-            query = self._redact_pii(query)
+        return redacted_query, pii_detected
+    
+    def _tokenize_query(self, query: str) -> Set[str]:
+        """
+        Lowercase and tokenize a query into distinct terms, skipping short words.
+        
+        Redaction placeholders are blanked out first, so "[REDACTED-EMAIL]"
+        does not turn into the search terms "redacted" and "email".
+        """
+        return set(_WORD_RE.findall(self._REDACTION_RE.sub(" ", query).lower()))
+    
+    def _make_result(self, doc: Dict[str, Any], score: float) -> Dict[str, Any]:
+        """Build a search result from a document, without its index-only fields."""
+        result = {key: value for key, value in doc.items() if key not in self.INDEX_ONLY_FIELDS}
+        result["score"] = score
+        return result
+    
+    def search(
+        self, query: str, top_k: int = 3, query_tokens: Optional[Set[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for relevant documents with PII detection.
+        
+        Documents are ranked with BM25 over the inverted index.
+        
+        Args:
+            query: Search query
+            top_k: Number of documents to return
+            query_tokens: Pre-computed tokens of an already redacted query.
+                When given, the PII pass and tokenization are skipped.
+            
+        Returns:
+            List of relevant documents
+        """
+        if query_tokens is None:
+            query, _ = self._screen_query(query)
+            query_tokens = self._tokenize_query(query)
         
         # Log the search
         self._log_action("SEARCH", f"Query: {query}", {'top_k': top_k})
         
-        query_lower = query.lower()
-        scored_docs = []
+        # Unknown words are mapped onto their closest indexed term
+        query_terms = {self._resolve_term(term) for term in query_tokens}
+        query_terms.discard(None)
+        scores: Dict[int, float] = {}
         
-        # Simple keyword matching
-        for doc in self.documents:
-            # Check authorization
-            if not self._check_authorization(doc):
-                continue
-            
-            score = 0
-            content_lower = doc["content"].lower()
-            
-            query_words = query_lower.split()
-            for word in query_words:
-                if len(word) > 3:
-                    score += content_lower.count(word)
-            
-            if score > 0:
-                scored_docs.append({
-                    **doc,
-                    "score": score
-                })
+        # Only documents that share a term with the query are ever scored
+        for term in query_terms:
+            for doc_idx, weight in self.postings.get(term, ()):
+                scores[doc_idx] = scores.get(doc_idx, 0.0) + weight
         
-        scored_docs.sort(key=lambda x: x["score"], reverse=True)
-        retrieved = scored_docs[:top_k]
+        # Pick top_k without sorting every match
+        top = heapq.nlargest(top_k, scores.items(), key=itemgetter(1))
+        retrieved = [self._make_result(self._searchable_docs[doc_idx], score) for doc_idx, score in top]
+        
+        self._log_action(
+            "AUTHORIZATION_SUMMARY",
+            f"Searched {len(self._searchable_docs)} authorized of {len(self.documents)} documents",
+            {
+                'authorized': len(self._searchable_docs),
+                'total': len(self.documents),
+                'candidates': len(scores)
+            }
+        )
         
         self._log_action(
             "RETRIEVAL",
@@ -287,9 +597,10 @@ class ComplianceRAGPipeline:
             }
         
         # Determine overall classification (highest level from sources)
-        classifications = [doc.get('classification', 'PUBLIC') for doc in context_docs]
-        classification_levels = {'PUBLIC': 0, 'INTERNAL': 1, 'CONFIDENTIAL': 2, 'RESTRICTED': 3}
-        overall_classification = max(classifications, key=lambda c: classification_levels.get(c, 0))
+        level = 0
+        for doc in context_docs:
+            level = max(level, _CLASSIFICATION_LEVELS.get(doc.get('classification', 'PUBLIC'), 0))
+        overall_classification = _CLASSIFICATION_NAMES[level]
         
         # Generate answer from most relevant document
         top_doc = context_docs[0]
@@ -309,8 +620,8 @@ class ComplianceRAGPipeline:
             for doc in context_docs
         ]
         
-        # Detect PII in answer
-        pii_detected = self._detect_pii(answer)
+        # Detect and redact PII in answer
+        redacted_answer, pii_detected = self._scan_and_redact(answer)
         
         self._log_action(
             "ANSWER_GENERATED",
@@ -327,7 +638,7 @@ class ComplianceRAGPipeline:
             'citations': citations,
             'pii_detected': len(pii_detected) > 0,
             'classification': overall_classification,
-            'redacted_answer': self._redact_pii(answer) if pii_detected else answer
+            'redacted_answer': redacted_answer
         }
     
     def query(self, question: str, top_k: int = 3) -> Dict[str, Any]:
@@ -341,14 +652,33 @@ class ComplianceRAGPipeline:
         Returns:
             Dict with answer and compliance metadata
         """
-        # Check for PII in question
-        pii_in_question = self._detect_pii(question)
+        # Check for PII in question and tokenize it once for retrieval
+        redacted_question, pii_in_question = self._screen_query(question)
         
-        # Retrieve documents
-        relevant_docs = self.search(question, top_k)
-        
-        # Generate answer
-        result = self.generate_answer(question, relevant_docs)
+        # Repeated questions are served from the cache. The key uses the
+        # redacted question so no raw PII is kept in the cache.
+        cache_key = (redacted_question.strip().lower(), top_k)
+        cached = self._query_cache.get(cache_key)
+        if cached is not None:
+            self._query_cache.move_to_end(cache_key)
+            self._log_action(
+                "CACHE_HIT",
+                f"Query: {redacted_question}",
+                {'top_k': top_k, 'document_ids': [c['document_id'] for c in cached['citations']]}
+            )
+            result = copy.deepcopy(cached)
+        else:
+            query_tokens = self._tokenize_query(redacted_question)
+            
+            # Retrieve documents
+            relevant_docs = self.search(redacted_question, top_k, query_tokens=query_tokens)
+            
+            # Generate answer
+            result = self.generate_answer(question, relevant_docs)
+            
+            self._query_cache[cache_key] = copy.deepcopy(result)
+            if len(self._query_cache) > self.QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
         
         # Add question info
         result['question'] = question
@@ -357,13 +687,30 @@ class ComplianceRAGPipeline:
         return result
     
     def get_audit_log(self) -> List[Dict[str, Any]]:
-        """Return the audit log."""
-        return self.audit_log
+        """Return the audit log with ISO timestamps."""
+        return [self._format_log_entry(entry) for entry in self.audit_log]
     
     def export_audit_log(self, filepath: str):
-        """Export audit log to a file."""
-        with open(filepath, 'w') as f:
-            json.dump(self.audit_log, f, indent=2)
+        """
+        Export audit log to a file in JSON Lines format (one entry per line).
+        
+        Entries are serialized and written one at a time, so the whole log is
+        never built up in memory. Uses orjson when it is installed.
+        """
+        # Serializers are imported here so the query path doesn't pay for them
+        try:
+            from orjson import dumps
+        except ImportError:  # optional: fall back to the standard library
+            import json
+            
+            # Compact UTF-8 output, byte-for-byte what orjson writes
+            def dumps(entry: Dict[str, Any]) -> bytes:
+                return json.dumps(entry, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        
+        with open(filepath, 'wb') as f:
+            for entry in self.audit_log:
+                f.write(dumps(self._format_log_entry(entry)))
+                f.write(b'\n')
         print(f"✓ Audit log exported to {filepath}")
 
 
@@ -456,7 +803,7 @@ def main():
             print(f"   python examples/compliance_rag/run_pipeline.py {user_id} \"{q}\"")
     print()
     print("Export audit log:")
-    print("   python -c \"from run_pipeline import *; p = ComplianceRAGPipeline(); p.export_audit_log('audit.json')\"")
+    print("   python -c \"from run_pipeline import *; p = ComplianceRAGPipeline(); p.export_audit_log('audit.jsonl')\"")
     print("=" * 80)
 
 
@@ -6,11 +6,15 @@ This script creates realistic but synthetic documents for HR, Finance, and Pharm
 to be used in RAG pipeline examples and demonstrations.
 """
 import os
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from pathlib import Path
 
 
 # Document templates for each domain
-FINANCE_DOCS = {
+_FINANCE_DOCS_RAW = {
     "audit_guidelines.txt": """Title: Internal Audit Guidelines Q2 2024
 
 Document ID: FIN-AUD-2024-Q2
@@ -84,7 +88,7 @@ Documentation Requirements:
 """,
 }
 
-HR_DOCS = {
+_HR_DOCS_RAW = {
     "employee_policy.txt": """Title: Employee Data Protection Policy 2024
 
 Document ID: HR-POL-2024-001
@@ -163,7 +167,7 @@ Recordkeeping:
 """,
 }
 
-PHARMA_DOCS = {
+_PHARMA_DOCS_RAW = {
     "fda_reporting_requirements.txt": """Title: FDA Drug Safety Reporting Protocol
 
 Document ID: PHARMA-FDA-2024-001
@@ -256,6 +260,39 @@ Participant Protection:
 }
 
 
+def _encode_docs(raw_docs: dict) -> dict:
+    """Normalize document templates to the exact bytes written to disk."""
+    return {filename: (content.strip() + "\n").encode("utf-8") for filename, content in raw_docs.items()}
+
+
+# Encoded once at import so generation only has to write the bytes out
+FINANCE_DOCS = _encode_docs(_FINANCE_DOCS_RAW)
+HR_DOCS = _encode_docs(_HR_DOCS_RAW)
+PHARMA_DOCS = _encode_docs(_PHARMA_DOCS_RAW)
+
+
+def write_corpus_db(db_path: Path, rows: list) -> None:
+    """
+    Write the whole corpus into a single SQLite database.
+    
+    Loaders can read every document with one query instead of opening
+    each file separately.
+    
+    Args:
+        db_path: Path of the database file (replaced if it exists)
+        rows: (category, filename, content) tuples
+    """
+    with closing(sqlite3.connect(db_path)) as db, db:
+        db.execute("DROP TABLE IF EXISTS docs")
+        db.execute(
+            "CREATE TABLE docs ("
+            "category TEXT NOT NULL, filename TEXT NOT NULL, content TEXT NOT NULL, "
+            "PRIMARY KEY (category, filename))"
+        )
+        db.execute("CREATE INDEX docs_category ON docs (category)")
+        db.executemany("INSERT INTO docs (category, filename, content) VALUES (?, ?, ?)", rows)
+
+
 def generate_docs(base_path: str = "data/real_world") -> None:
     """
     Generate synthetic enterprise documents.
@@ -274,17 +311,29 @@ def generate_docs(base_path: str = "data/real_world") -> None:
         "pharma_regulations": PHARMA_DOCS,
     }
     
-    doc_count = 0
+    # Create every category directory up front, then write all files in
+    # parallel so the per-file open/write/close latency overlaps
+    files = []
     for category, docs in categories.items():
         category_dir = base_dir / category
         category_dir.mkdir(exist_ok=True)
-        
         for filename, content in docs.items():
-            filepath = category_dir / filename
-            with open(filepath, "w") as f:
-                f.write(content.strip() + "\n")
-            doc_count += 1
-            print(f"✓ Created: {filepath}")
+            files.append((category_dir / filename, content))
+    
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(lambda item: item[0].write_bytes(item[1]), files))
+    
+    # Also pack the corpus into one database for single-read loading
+    db_path = base_dir / "corpus.db"
+    write_corpus_db(
+        db_path,
+        [(filepath.parent.name, filepath.name, content.decode("utf-8")) for filepath, content in files],
+    )
+    
+    doc_count = len(files)
+    # Report all created files with one write instead of a print per file
+    sys.stdout.write("".join(f"✓ Created: {filepath}\n" for filepath, _ in files))
+    print(f"✓ Created: {db_path}")
     
     print(f"\n✅ Successfully generated {doc_count} synthetic documents under {base_path}/")
     print(f"   - Finance reports: {len(FINANCE_DOCS)} files")
@@ -293,8 +342,6 @@ def generate_docs(base_path: str = "data/real_world") -> None:
 
 
 if __name__ == "__main__":
-    import sys
-    
     # Allow custom path as command-line argument
     base_path = sys.argv[1] if len(sys.argv) > 1 else "data/real_world"
     